@@ -1,73 +1,190 @@
-from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+from fastapi.responses import JSONResponse, Response
 from sse_starlette.sse import EventSourceResponse  # type: ignore[import]
 from datetime import datetime, timedelta
 import logging
 from asyncio import Queue, sleep as asyncio_sleep
-from typing import Dict, Any, AsyncGenerator
+from typing import Dict, Any, AsyncGenerator, Optional
 import json
 import asyncio
 
 from app.services.gmail_service import GmailService
 from app.services.graph_service import GraphService
+from app.services.graph_codec import (
+    GRAPH_MEDIA_TYPE,
+    accepts_graph_encoding,
+    encode_graph,
+)
+from app.services.meeting_index import meeting_timestamp
 from app.services.email_processor import EmailProcessor
 from app.services.session_manager import SessionManager
+from app.services.edit_buffer import NodeEditBuffer
+from app.config import NODE_EDIT_FLUSH_INTERVAL, NODE_EDIT_FLUSH_THRESHOLD
+from app.metrics import PENDING_NODE_EDITS, PROGRESS_QUEUE_DEPTH
 
 router = APIRouter()
 session_manager = SessionManager()
+edit_buffer = NodeEditBuffer(NODE_EDIT_FLUSH_INTERVAL, NODE_EDIT_FLUSH_THRESHOLD)
+logger = logging.getLogger(__name__)
 
 generation_in_progress = {}
 
 # Store progress queues and last generation times
-progress_queues = {}
+progress_queues: Dict[str, Queue] = {}
 last_generation = {}
 # Add a dictionary to track the current progress for each user
 current_progress = {}
 
+# Queue depths are only computed when metrics are scraped
+PROGRESS_QUEUE_DEPTH.set_function(
+    lambda: sum(queue.qsize() for queue in list(progress_queues.values()))
+)
+PENDING_NODE_EDITS.set_function(
+    lambda: sum(len(edits) for edits in list(edit_buffer.pending.values()))
+)
+
 
 @router.get("/graph")
-async def get_graph(user_id: str = None):
-    """Get the user's graph"""
+async def get_graph(
+    request: Request,
+    user_id: str = None,
+    view: str = "full",
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+):
+    """Get the user's graph, either fully expanded or aggregated by domain.
+
+    With from/to ISO dates only the nodes and links active in that window are
+    returned. Only the full graph without a window can be sent in the compact
+    binary encoding, when the client accepts application/x-msgpack, the other
+    views are always JSON.
+    """
     try:
-        logging.info(f"Getting graph for user {user_id}")
+        logger.debug("Getting graph for user %s", user_id)
         if not user_id:
             raise HTTPException(status_code=401, detail="Please login first")
+        if view not in ("full", "domain"):
+            raise HTTPException(status_code=400, detail=f"Unknown view: {view}")
+        start_ts = meeting_timestamp(start) if start else None
+        end_ts = meeting_timestamp(end, end_of_day=True) if end else None
+        if (start and start_ts is None) or (end and end_ts is None):
+            raise HTTPException(
+                status_code=400, detail="from and to must be ISO 8601 dates"
+            )
+        windowed = start is not None or end is not None
 
         session = await session_manager.get_session(user_id)
-        logging.info(f"Got session for user {user_id}: {session is not None}")
+        logger.debug("Got session for user %s: %s", user_id, session is not None)
         if not session:
             return JSONResponse(
                 status_code=401,
                 content={"detail": "Session expired. Please login again."},
             )
 
-        graph_service = GraphService(user_id)
-        graph_data = graph_service._load_graph()
-        logging.info(f"Loaded graph for user {user_id}: {graph_data is not None}")
-
-        if not graph_data:
-            graph_data = {"nodes": [], "links": []}
-
         # If a generation is in progress for this user, pass that back in JSON
         is_generating = generation_in_progress.get(user_id, False)
         # Include the current progress in the response
         progress_value = current_progress.get(user_id, 0) if is_generating else 0
+        headers = {
+            "Cache-Control": "no-store",
+            "Pragma": "no-cache",
+            "X-Session-ID": user_id,
+        }
+
+        graph_service = GraphService(user_id, load=False)
+        # The stored aggregate is used unless unsaved edits move contacts
+        if (
+            view == "domain"
+            and not windowed
+            and not edit_buffer.has_pending(user_id, "companyDomain")
+        ):
+            graph_data = graph_service.get_domain_graph()
+        else:
+            if windowed:
+                graph_service.load_indexed()
+            else:
+                graph_service._load_graph()
+            # Reads see edits that haven't been saved yet
+            edit_buffer.apply_pending(user_id, graph_service)
+            logger.info(
+                "Loaded graph for user %s: %d nodes", user_id, len(graph_service.nodes)
+            )
+            if windowed:
+                graph_data = graph_service.get_subgraph(
+                    start_ts, end_ts, by_domain=view == "domain"
+                )
+            elif view == "domain":
+                graph_data = graph_service._build_domain_graph()
+            else:
+                # Only the full graph's encoding depends on Accept
+                headers["Vary"] = "Accept"
+                if accepts_graph_encoding(request.headers.get("accept", "")):
+                    return Response(
+                        content=encode_graph(
+                            graph_service.nodes.values(),
+                            graph_service.links,
+                            {
+                                "view": view,
+                                "version": graph_service.version,
+                                "is_generating": is_generating,
+                                "current_progress": progress_value,
+                            },
+                        ),
+                        media_type=GRAPH_MEDIA_TYPE,
+                        headers=headers,
+                    )
+                graph_data = graph_service.to_dict()
 
         return JSONResponse(
             content={
                 "nodes": graph_data["nodes"],
                 "links": graph_data["links"],
+                "view": view,
+                "version": graph_data.get("version", 0),
                 "is_generating": is_generating,
                 "current_progress": progress_value,
             },
+            headers=headers,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error getting graph: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/graph/domain/{domain}")
+async def get_domain(domain: str, user_id: Optional[str] = None):
+    """Expand a single domain super-node into its contacts"""
+    try:
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Please login first")
+
+        session = await session_manager.get_session(user_id)
+        if not session:
+            return JSONResponse(
+                status_code=401,
+                content={"detail": "Session expired. Please login again."},
+            )
+
+        graph_service = GraphService(user_id)
+        edit_buffer.apply_pending(user_id, graph_service)
+        graph_data = graph_service.expand_domain(domain)
+        if not graph_data["nodes"]:
+            raise HTTPException(status_code=404, detail=f"Unknown domain: {domain}")
+
+        return JSONResponse(
+            content=graph_data,
             headers={
                 "Cache-Control": "no-store",
                 "Pragma": "no-cache",
                 "X-Session-ID": user_id,
             },
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error getting graph: {e}", exc_info=True)
+        logger.error("Error expanding domain: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -75,7 +192,7 @@ async def get_graph(user_id: str = None):
 async def generate_graph(user_id: str):
     """Generate a new graph"""
     try:
-        logging.info(f"Starting graph generation for user {user_id}")
+        logger.info("Starting graph generation for user %s", user_id)
         if user_id in last_generation:
             time_since_last = datetime.now() - last_generation[user_id]
             if time_since_last < timedelta(minutes=0.5):
@@ -99,20 +216,20 @@ async def generate_graph(user_id: str):
         generation_in_progress[user_id] = True
 
         try:
-            logging.info("Creating services...")
-            gmail_service = GmailService(session.credentials)
-            graph_service = GraphService(user_id)
-            email_processor = EmailProcessor(
-                gmail_service, graph_service, progress_queues[user_id]
-            )
+            # Buffered node edits are flushed once the generation has saved
+            async with edit_buffer.lock(user_id):
+                logger.debug("Creating services...")
+                gmail_service = GmailService(session.credentials)
+                graph_service = GraphService(user_id)
+                email_processor = EmailProcessor(
+                    gmail_service, graph_service, progress_queues[user_id]
+                )
 
-            processed_emails = set()
-            logging.info("Starting email processing...")
-            await email_processor.process_emails(processed_emails)
-            logging.info("Email processing complete")
+                processed_emails = set()
+                await email_processor.process_emails(processed_emails)
 
-            graph_service.save_graph()
-            logging.info("Graph saved successfully")
+                graph_service.save_graph()
+                logger.info("Graph saved for user %s", user_id)
 
             return {"status": "success", "processed_emails": len(processed_emails)}
         except Exception as e:
@@ -124,7 +241,7 @@ async def generate_graph(user_id: str):
             # On success or fail, mark not in progress
             generation_in_progress[user_id] = False
     except Exception as e:
-        logging.error(f"Error generating graph: {e}", exc_info=True)
+        logger.error("Error generating graph: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -160,7 +277,7 @@ async def graph_progress(user_id: str):
                         "data": json.dumps({"progress": "keep-alive"}),
                     }
         except Exception as e:
-            logging.error(f"Error in progress stream: {e}")
+            logger.error("Error in progress stream: %s", e)
             yield {"event": "error", "data": str(e)}
         finally:
             # Only remove from progress_queues if generation is complete
@@ -186,15 +303,18 @@ async def update_node(node_id: str, node_data: dict = Body(...), user_id: str =
                 content={"detail": "Session expired. Please login again."},
             )
 
-        graph_service = GraphService(user_id)
-        logging.info(
-            f"Updating node {node_id} for user {user_id} with data: {node_data}"
+        # Notes are user content, only log which fields changed
+        logger.info(
+            "Updating node %s for user %s, fields: %s",
+            node_id,
+            user_id,
+            ", ".join(node_data),
         )
-        graph_service.update_node_metadata(node_id, node_data)
-        graph_service.save_graph()
+        # Saved by the edit buffer together with other recent edits
+        edit_buffer.add(user_id, node_id, node_data)
 
-        logging.info(f"Node {node_id} updated successfully")
+        logger.debug("Node %s update queued", node_id)
         return {"status": "success"}
     except Exception as e:
-        logging.error(f"Error updating node: {e}")
+        logger.error("Error updating node: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -10,11 +10,45 @@ DATABASE_URL = os.environ.get(
     "DATABASE_URL", "postgresql://beyondmeet:beyondmeet@db:5432/beyondmeet"
 )
 
+# Graph storage format, either "json" or "msgpack"
+GRAPH_STORAGE_FORMAT = os.environ.get("GRAPH_STORAGE_FORMAT", "json")
+
+# Time-range subgraphs
+# Nodes, links and meetings of the graphs cached for range queries, over all
+# users of a worker. Graphs larger than this aren't cached.
+MEETING_INDEX_CACHE_ENTRIES = int(
+    os.environ.get("MEETING_INDEX_CACHE_ENTRIES", "200000")
+)
+RECENCY_HALF_LIFE_DAYS = 30
+
+# Node metadata edits are buffered and saved together
+NODE_EDIT_FLUSH_INTERVAL = float(os.environ.get("NODE_EDIT_FLUSH_INTERVAL", "2"))
+NODE_EDIT_FLUSH_THRESHOLD = int(os.environ.get("NODE_EDIT_FLUSH_THRESHOLD", "50"))
+
+# Log per-stage timings of every generation
+TRACE_GENERATIONS = os.environ.get("TRACE_GENERATIONS", "").lower() in ("1", "true")
+
+# Seconds each dependency gets to answer the readiness check
+READINESS_TIMEOUT = 2
+
+# Logging, LOG_FORMAT is either "text" or "json"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = 10000
+# Repeated warnings and errors are let through this many times per period
+LOG_RATE_LIMIT_BURST = int(os.environ.get("LOG_RATE_LIMIT_BURST", "10"))
+LOG_RATE_LIMIT_PERIOD = float(os.environ.get("LOG_RATE_LIMIT_PERIOD", "60"))
+# Share of debug and info records kept per logger, e.g. "uvicorn.access=0.1"
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+
 # Redis Configuration
-REDIS_HOST = "redis"
-REDIS_PORT = 6379
+REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
+REDIS_PORT = int(os.environ.get("REDIS_PORT", "6379"))
 REDIS_DB = 0
 
+# Gmail API Configuration, the endpoint can point to a stand-in server
+GMAIL_API_ENDPOINT = os.environ.get("GMAIL_API_ENDPOINT")
+
 # Email Configuration
 QUERY_DAYS = 365
 IGNORED_EMAILS = []
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, Table, MetaData
+from sqlalchemy import create_engine, Column, LargeBinary, String, Table, MetaData
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.config import DATABASE_URL
@@ -13,4 +13,6 @@ graph_table = Table(
     Column("id", String, primary_key=True),
     Column("user_id", String, nullable=False),
     Column("data", JSONB),
+    # Columnar msgpack encoding of nodes and links, see app.services.graph_codec
+    Column("blob", LargeBinary, nullable=True),
 )
@@ -0,0 +1,259 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import (
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_RATE_LIMIT_BURST,
+    LOG_RATE_LIMIT_PERIOD,
+    LOG_SAMPLE_RATES,
+)
+from app.metrics import LOG_RECORDS_DROPPED
+
+# Attributes every LogRecord has, anything else was passed through extra=.
+# uvicorn passes color_message, a copy of the message with ANSI colors.
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "color_message",
+}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with extra= fields as top level keys"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit repeated warnings and errors.
+
+    Records of the same logger and message template are let through at most
+    burst times per period. When a period with suppressed records ends, a
+    summary record with their count is passed to emit, either on the next
+    matching record or from the background sweep.
+    """
+
+    def __init__(
+        self,
+        burst: int,
+        period: float,
+        emit: Callable[[logging.LogRecord], None],
+        max_keys: int = 1000,
+    ):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.emit = emit
+        self.max_keys = max_keys
+        # (logger, template) -> [window start, count, suppressed, level]
+        self.windows: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            summaries = []
+            window = self.windows.get(key)
+            if window is not None and now - window[0] >= self.period:
+                summaries += self._close(key)
+                window = None
+            if window is None:
+                if len(self.windows) >= self.max_keys:
+                    summaries += self._close_expired(now)
+                if len(self.windows) >= self.max_keys:
+                    summaries += self._close(next(iter(self.windows)))
+                self.windows[key] = [now, 1, 0, record.levelno]
+                allowed = True
+            elif window[1] < self.burst:
+                window[1] += 1
+                allowed = True
+            else:
+                window[2] += 1
+                allowed = False
+        for summary in summaries:
+            self.emit(summary)
+        if not allowed:
+            LOG_RECORDS_DROPPED.labels("rate_limited").inc()
+        return allowed
+
+    def _close(self, key: Tuple[str, str]) -> List[logging.LogRecord]:
+        """Remove a window, returning its summary if it suppressed anything"""
+        _, _, suppressed, level = self.windows.pop(key)
+        if not suppressed:
+            return []
+        name, template = key
+        summary = logging.LogRecord(
+            name,
+            int(level),
+            "",
+            0,
+            "Suppressed %d similar messages: %s",
+            (int(suppressed), template),
+            None,
+        )
+        summary.suppressed = int(suppressed)
+        return [summary]
+
+    def _close_expired(self, now: float) -> List[logging.LogRecord]:
+        summaries = []
+        for key, window in list(self.windows.items()):
+            if now - window[0] >= self.period:
+                summaries += self._close(key)
+        return summaries
+
+    def sweep(self, now: Optional[float] = None):
+        """Close ended windows, or all of them when now is infinite"""
+        with self._lock:
+            summaries = self._close_expired(time.monotonic() if now is None else now)
+        for summary in summaries:
+            self.emit(summary)
+
+    def start(self):
+        """Sweep ended windows in the background"""
+
+        def run():
+            while not self._stopped.wait(self.period):
+                self.sweep()
+
+        threading.Thread(target=run, name="log-rate-limit", daemon=True).start()
+
+    def stop(self):
+        """Stop sweeping and report every pending suppressed count"""
+        self._stopped.set()
+        self.sweep(now=float("inf"))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of the debug and info records of chosen loggers.
+
+    Rates apply to a logger and its children, the most specific one wins.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1 or random.random() < rate:
+            return True
+        LOG_RECORDS_DROPPED.labels("sampled").inc()
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when full.
+
+    Only the message is formatted in the logging thread, the listener
+    thread does the rest of the formatting and the writes.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "logger=rate,logger=rate" into a dict"""
+    rates = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging() -> QueueListener:
+    """Route all logging through a queue written by a background thread.
+
+    The listener is stopped at exit, after uvicorn's last messages, which
+    writes out whatever is still queued, including pending suppressed counts.
+    """
+    output = logging.StreamHandler()
+    output.setFormatter(
+        JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    # Summaries bypass the filters, they were already counted
+    rate_limit = RateLimitFilter(
+        LOG_RATE_LIMIT_BURST, LOG_RATE_LIMIT_PERIOD, emit=handler.emit
+    )
+    handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+    handler.addFilter(rate_limit)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+    # uvicorn installs its own stream handlers before loading the app
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        if uvicorn_logger.handlers:
+            uvicorn_logger.handlers = [handler]
+            uvicorn_logger.propagate = False
+
+    listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    rate_limit.start()
+    # Exit handlers run last in first out, report suppressed counts first
+    atexit.register(listener.stop)
+    atexit.register(rate_limit.stop)
+    return listener
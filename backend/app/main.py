@@ -1,32 +1,89 @@
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-import time
+from contextlib import asynccontextmanager
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
-from fastapi.responses import JSONResponse
-from collections import defaultdict
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.api import auth, graph
+from app.api.graph import edit_buffer
+from app.config import GOOGLE_CLIENT_ID, READINESS_TIMEOUT
 from app.database import metadata, engine
+from app.logging_config import setup_logging
+from app.metrics import MetricsMiddleware, monitor_event_loop_lag
 from app.services.session_manager import SessionManager
 
-# Setup basic logging
-# Configure root logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],  # This ensures logs go to stdout
-)
+# Write logs from a background thread, so request handlers never block on stdout
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def _create_tables():
+    metadata.create_all(engine)
+    # create_all doesn't alter existing tables, add columns introduced later
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE graph ADD COLUMN IF NOT EXISTS blob BYTEA"))
+
+
+def _ping_database():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def initialize_database(delay=1, max_delay=10):
+    """Create tables once the database accepts connections.
+
+    Retries in the background so the app starts serving liveness checks
+    right away, readiness reports the database until this succeeds.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(_create_tables)
+            app.state.database_ready = True
+            logger.info("Database initialized")
+            return
+        except OperationalError:
+            logger.warning("Database not ready, retrying in %s seconds...", delay)
+        except Exception as e:
+            # Schema or permission errors need fixing, keep retrying so
+            # readiness recovers once they are
+            logger.error(
+                "Database initialization failed, retrying in %s seconds: %s",
+                delay,
+                e,
+                exc_info=True,
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Set a larger limit for asyncio tasks
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=20))
+    logger.info("GOOGLE_CLIENT_ID from config: %s", GOOGLE_CLIENT_ID)
+
+    app.state.database_ready = False
+    database_task = asyncio.create_task(initialize_database())
+    lag_task = asyncio.create_task(monitor_event_loop_lag())
+    edit_buffer.start()
+    try:
+        yield
+    finally:
+        database_task.cancel()
+        lag_task.cancel()
+        # Write node edits that are still buffered
+        await edit_buffer.stop()
+        engine.dispose()
 
-# Ensure all loggers show INFO level
-logging.getLogger().setLevel(logging.INFO)
-logging.getLogger("uvicorn").setLevel(logging.INFO)
-logging.getLogger("fastapi").setLevel(logging.INFO)
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -42,42 +99,46 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
+# Include routers
+app.include_router(auth.router, prefix="/api", tags=["auth"])
+app.include_router(graph.router, prefix="/api", tags=["graph"])
 
-# Add retry mechanism for database connection
-def wait_for_db(retries=5, delay=2):
-    """Wait for database to be ready"""
-    for i in range(retries):
-        try:
-            # Try to connect to the database
-            with engine.connect() as conn:
-                return True
-        except OperationalError as e:
-            if i == retries - 1:
-                raise e
-            logging.warning(f"Database not ready, retrying in {delay} seconds...")
-            time.sleep(delay)
-    return False
-
+# Initialize session manager
+session_manager = SessionManager()
 
-# Wait for database before creating tables
-wait_for_db()
 
-# Create database tables
-metadata.create_all(engine)
+@app.get("/healthz")
+async def healthz():
+    """Liveness check, succeeds as long as the event loop is responsive"""
+    return {"status": "ok"}
 
-# Include routers
-app.include_router(auth.router, prefix="/api", tags=["auth"])
-app.include_router(graph.router, prefix="/api", tags=["graph"])
 
+@app.get("/readyz")
+async def readyz():
+    """Readiness check, succeeds once the database and Redis are reachable"""
+    checks = {"database": False, "redis": False}
+    if app.state.database_ready:
+        try:
+            await asyncio.wait_for(asyncio.to_thread(_ping_database), READINESS_TIMEOUT)
+            checks["database"] = True
+        except Exception as e:
+            logger.warning("Readiness check failed for database: %s", e)
+    try:
+        await asyncio.wait_for(session_manager.redis.ping(), READINESS_TIMEOUT)
+        checks["redis"] = True
+    except Exception as e:
+        logger.warning("Readiness check failed for redis: %s", e)
 
-# Add startup event to initialize asyncio policies
-@app.on_event("startup")
-async def startup_event():
-    # Set a larger limit for asyncio tasks
-    loop = asyncio.get_event_loop()
-    loop.set_default_executor(ThreadPoolExecutor(max_workers=20))
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "checks": checks},
+    )
 
 
-# Initialize session manager
-session_manager = SessionManager()
+@app.get("/metrics")
+async def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
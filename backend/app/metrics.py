@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import TRACE_GENERATIONS
+
+logger = logging.getLogger(__name__)
+
+# Buckets for per-message work, which mostly takes well under a second
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "beyondmeet_http_request_seconds",
+    "HTTP request duration by route",
+    ["method", "route", "status"],
+)
+
+GMAIL_REQUEST_SECONDS = Histogram(
+    "beyondmeet_gmail_request_seconds",
+    "Gmail API request duration",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+GMAIL_REQUEST_ERRORS = Counter(
+    "beyondmeet_gmail_request_errors_total",
+    "Failed Gmail API requests",
+    ["operation", "status"],
+)
+GMAIL_BYTES_FETCHED = Counter(
+    "beyondmeet_gmail_fetched_bytes_total",
+    "Size of the raw messages fetched from Gmail, after base64 decoding",
+)
+
+GENERATION_STAGE_SECONDS = Histogram(
+    "beyondmeet_generation_stage_seconds",
+    "Time spent per message in each generation stage",
+    ["stage"],
+    buckets=FAST_BUCKETS,
+)
+GENERATION_SECONDS = Histogram(
+    "beyondmeet_generation_seconds",
+    "Duration of whole graph generations",
+    ["result"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+GENERATION_MESSAGES_PER_SECOND = Gauge(
+    "beyondmeet_generation_messages_per_second",
+    "Message throughput of the last finished generation",
+)
+GENERATIONS_IN_PROGRESS = Gauge(
+    "beyondmeet_generations_in_progress", "Graph generations currently running"
+)
+MESSAGES_PROCESSED = Counter(
+    "beyondmeet_messages_processed_total",
+    "Messages handled by the email processor",
+    ["result"],
+)
+
+PROGRESS_QUEUE_DEPTH = Gauge(
+    "beyondmeet_progress_queue_depth",
+    "Progress events waiting to be streamed, over all users",
+)
+PENDING_NODE_EDITS = Gauge(
+    "beyondmeet_pending_node_edits", "Node edits buffered and not yet saved"
+)
+
+CACHE_REQUESTS = Counter(
+    "beyondmeet_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+GRAPH_DB_SECONDS = Histogram(
+    "beyondmeet_graph_db_seconds",
+    "Graph database operation duration",
+    ["operation"],
+)
+GRAPH_SAVED_NODES = Histogram(
+    "beyondmeet_graph_saved_nodes",
+    "Number of nodes in saved graphs",
+    buckets=(10, 100, 500, 1000, 5000, 10000, 50000, 100000),
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "beyondmeet_event_loop_lag_seconds",
+    "How late the event loop wakes up from a sleep",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_LAST_LAG = Gauge(
+    "beyondmeet_event_loop_last_lag_seconds", "Most recently measured event loop lag"
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "beyondmeet_log_records_dropped_total",
+    "Log records not written, by reason",
+    ["reason"],
+)
+
+
+@contextmanager
+def observe(histogram, *labels):
+    """Time the block into a histogram, with the given label values"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(*labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+
+async def monitor_event_loop_lag(interval: float = 0.1):
+    """Measure event loop lag until cancelled.
+
+    A sleep that wakes up late means callbacks were blocking the loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - start - interval, 0.0)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        EVENT_LOOP_LAST_LAG.set(lag)
+
+
+class GenerationTrace:
+    """Stage timings of one graph generation.
+
+    Every stage is always recorded in the stage histogram. When
+    TRACE_GENERATIONS is set, the spans are also summed per generation and
+    logged as a single line once it finishes.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.enabled = TRACE_GENERATIONS
+        self.started = time.perf_counter()
+        # Count and total seconds per stage
+        self.spans: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            GENERATION_STAGE_SECONDS.labels(stage).observe(duration)
+            if self.enabled:
+                span = self.spans[stage]
+                span[0] += 1
+                span[1] += duration
+
+    def finish(self, messages: int, result: str = "ok"):
+        duration = time.perf_counter() - self.started
+        GENERATION_SECONDS.labels(result).observe(duration)
+        if result == "ok" and duration > 0:
+            GENERATION_MESSAGES_PER_SECOND.set(messages / duration)
+        if self.enabled:
+            spans = ", ".join(
+                f"{stage}={total:.3f}s/{count}"
+                for stage, (count, total) in sorted(self.spans.items())
+            )
+            logger.info(
+                "Generation trace for user %s (%s): %d messages in %.3fs, %s",
+                self.user_id,
+                result,
+                messages,
+                duration,
+                spans,
+                extra={"stages": dict(self.spans)},
+            )
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing requests by their route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            ).observe(time.perf_counter() - start)
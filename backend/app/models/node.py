@@ -0,0 +1,153 @@
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+# Metadata fields users are allowed to edit
+METADATA_FIELDS = [
+    "company",
+    "companyDomain",
+    "firstName",
+    "lastName",
+    "linkedinUrl",
+    "notes",
+]
+
+
+def _intern(value: Any) -> str:
+    return sys.intern(str(value)) if value else ""
+
+
+class Meeting(NamedTuple):
+    date: str
+    title: str
+    location: str
+
+    @classmethod
+    def interned(cls, date: Any, title: Any, location: Any) -> "Meeting":
+        """Create a meeting sharing its strings with the other attendees' copies"""
+        return cls(_intern(date), _intern(title), _intern(location))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Meeting":
+        return cls.interned(
+            data.get("date", ""), data.get("title", ""), data.get("location", "")
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"date": self.date, "title": self.title, "location": self.location}
+
+
+class Node:
+    """A contact in the graph.
+
+    Nodes are converted to the JSON dict shape only when they are saved or
+    returned by the API. Repeated strings like company domains and meeting
+    fields are interned, and the node's email is its id.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "company",
+        "companyDomain",
+        "firstName",
+        "lastName",
+        "linkedinUrl",
+        "notes",
+        "meetings",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str = "",
+        company: str = "",
+        companyDomain: str = "",
+        firstName: str = "",
+        lastName: str = "",
+        linkedinUrl: str = "",
+        notes: str = "",
+        meetings: Optional[List[Meeting]] = None,
+    ):
+        self.id = id
+        self.name = name
+        self.company = _intern(company)
+        self.companyDomain = _intern(companyDomain)
+        self.firstName = firstName or ""
+        self.lastName = lastName or ""
+        self.linkedinUrl = linkedinUrl or ""
+        self.notes = notes or ""
+        self.meetings = meetings if meetings is not None else []
+
+    @property
+    def email(self) -> str:
+        return self.id
+
+    @classmethod
+    def from_email(cls, email: str) -> "Node":
+        """Create a node for a newly seen participant"""
+        name, _, domain = email.partition("@")
+        return cls(email, name=name, company=domain, companyDomain=domain)
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Any], meeting_pool: Optional[Dict[Meeting, Meeting]] = None
+    ) -> "Node":
+        """Create a node from its stored JSON shape, filling in missing fields.
+
+        Meetings found in meeting_pool are reused so attendees share one tuple.
+        """
+        meetings = [Meeting.from_dict(m) for m in data.get("meetings", [])]
+        if meeting_pool is not None:
+            meetings = [meeting_pool.setdefault(m, m) for m in meetings]
+        return cls(
+            data["id"],
+            name=data.get("name", ""),
+            company=data.get("company", ""),
+            companyDomain=data.get("companyDomain", ""),
+            firstName=data.get("firstName", ""),
+            lastName=data.get("lastName", ""),
+            linkedinUrl=data.get("linkedinUrl", ""),
+            notes=data.get("notes", ""),
+            meetings=meetings,
+        )
+
+    def to_dict(self, meetings: Optional[Iterable[Meeting]] = None) -> Dict[str, Any]:
+        """Convert to the JSON shape, optionally with only the given meetings"""
+        return {
+            "id": self.id,
+            "email": self.id,
+            "name": self.name,
+            "company": self.company,
+            "companyDomain": self.companyDomain,
+            "firstName": self.firstName,
+            "lastName": self.lastName,
+            "linkedinUrl": self.linkedinUrl,
+            "notes": self.notes,
+            "meetings": [
+                m.to_dict() for m in (self.meetings if meetings is None else meetings)
+            ],
+        }
+
+    def copy(self) -> "Node":
+        """Copy the node, sharing its meetings list"""
+        node = Node.__new__(Node)
+        for field in self.__slots__:
+            setattr(node, field, getattr(self, field))
+        return node
+
+    def add_meetings(self, meetings: Iterable[Meeting]):
+        """Append meetings the node doesn't have yet"""
+        existing = set(self.meetings)
+        for meeting in meetings:
+            if meeting not in existing:
+                existing.add(meeting)
+                self.meetings.append(meeting)
+
+    def update_metadata(self, metadata: Dict[str, Any]):
+        """Update the user-editable fields present in metadata"""
+        for field in METADATA_FIELDS:
+            if field in metadata:
+                value = metadata[field] or ""
+                if field in ("company", "companyDomain"):
+                    value = _intern(value)
+                setattr(self, field, value)
@@ -0,0 +1,124 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models.node import Meeting, Node
+
+
+def node_domain(node: Node) -> str:
+    """Get the company domain a node is grouped under"""
+    if node.companyDomain:
+        return node.companyDomain.lower()
+    return node.id.partition("@")[2].lower()
+
+
+def aggregate_by_domain(
+    nodes: Iterable[Node],
+    links: Iterable[Tuple[str, str]],
+    meetings: Optional[Dict[str, List[Meeting]]] = None,
+    strengths: Optional[Dict[Tuple[str, str], float]] = None,
+) -> Dict[str, Any]:
+    """Collapse contacts into one super-node per company domain.
+
+    When meetings is given it replaces the meetings of the nodes it contains.
+
+    Links are stored in both directions, so contact pairs are counted once.
+    Edge weight is the number of contact pairs linking the two domains and the
+    edge meeting count is the number of distinct meetings both domains attended.
+    When strengths is given, keyed by sorted contact pair, edge weight sums the
+    strengths of the pairs instead.
+    """
+    domain_of: Dict[str, str] = {}
+    contacts: Dict[str, int] = defaultdict(int)
+    domain_meetings: Dict[str, Set[Meeting]] = defaultdict(set)
+
+    for node in nodes:
+        domain = node_domain(node)
+        domain_of[node.id] = domain
+        contacts[domain] += 1
+        if meetings is not None and node.id in meetings:
+            domain_meetings[domain].update(meetings[node.id])
+        else:
+            domain_meetings[domain].update(node.meetings)
+
+    internal_links: Dict[str, int] = defaultdict(int)
+    weights: Dict[Tuple[str, str], float] = defaultdict(int)
+    seen_pairs = set()
+    for source, target in links:
+        pair = (source, target) if source < target else (target, source)
+        if pair in seen_pairs:
+            continue
+        seen_pairs.add(pair)
+        source_domain = domain_of.get(source)
+        target_domain = domain_of.get(target)
+        if source_domain is None or target_domain is None:
+            continue
+        weight = strengths.get(pair, 0.0) if strengths is not None else 1
+        if source_domain == target_domain:
+            internal_links[source_domain] += 1
+        elif source_domain < target_domain:
+            weights[(source_domain, target_domain)] += weight
+        else:
+            weights[(target_domain, source_domain)] += weight
+
+    return {
+        "nodes": [
+            {
+                "id": domain,
+                "type": "domain",
+                "companyDomain": domain,
+                "contactCount": count,
+                "meetingCount": len(domain_meetings[domain]),
+                "internalLinks": internal_links.get(domain, 0),
+            }
+            for domain, count in contacts.items()
+        ],
+        "links": [
+            {
+                "source": source,
+                "target": target,
+                "weight": weight,
+                "meetingCount": len(domain_meetings[source] & domain_meetings[target]),
+            }
+            for (source, target), weight in weights.items()
+        ],
+    }
+
+
+def expand_domain(
+    nodes: List[Node], links: Iterable[Tuple[str, str]], domain: str
+) -> Dict[str, Any]:
+    """Get the contacts of one domain with their links.
+
+    Links between two contacts of the domain are returned as is, links to
+    contacts elsewhere are folded onto the other domain's super-node.
+    """
+    domain = domain.lower()
+    domain_of = {node.id: node_domain(node) for node in nodes}
+    members = [node for node in nodes if domain_of[node.id] == domain]
+    member_ids = {node.id for node in members}
+
+    inner_links = set()
+    outer_pairs = set()
+    for source, target in links:
+        if source not in member_ids:
+            source, target = target, source
+        if source not in member_ids or target not in domain_of:
+            continue
+        if target in member_ids:
+            inner_links.add((source, target) if source < target else (target, source))
+        else:
+            outer_pairs.add((source, target))
+
+    outer_weights: Dict[Tuple[str, str], int] = defaultdict(int)
+    for source, target in outer_pairs:
+        outer_weights[(source, domain_of[target])] += 1
+
+    return {
+        "domain": domain,
+        "nodes": [node.to_dict() for node in members],
+        "links": [{"source": s, "target": t} for (s, t) in inner_links]
+        + [
+            {"source": source, "target": target, "weight": weight}
+            for (source, target), weight in outer_weights.items()
+        ],
+    }
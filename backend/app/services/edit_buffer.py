@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from app.models.node import METADATA_FIELDS
+from app.services.graph_service import GraphService
+
+logger = logging.getLogger(__name__)
+
+
+class NodeEditBuffer:
+    """Write-behind buffer for node metadata edits.
+
+    Edits are merged per user and node in memory and written with a single
+    graph save once the user's oldest pending edit is older than the flush
+    interval, or once the number of edited nodes reaches the threshold.
+    Flushes and graph generations for a user hold the same lock, so a
+    generation's save never overwrites edits made while it was running.
+    """
+
+    def __init__(self, flush_interval: float, flush_threshold: int):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.pending: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self.first_edit: Dict[str, float] = {}
+        self.flushing: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._task: Optional[asyncio.Task] = None
+        # At most one threshold flush per user waits for the lock
+        self._threshold_flushes: Dict[str, asyncio.Task] = {}
+
+    def lock(self, user_id: str) -> asyncio.Lock:
+        """Get the lock serializing graph writes for a user"""
+        return self.locks[user_id]
+
+    def add(self, user_id: str, node_id: str, metadata: Dict[str, Any]):
+        """Queue a metadata edit, later edits of a field win"""
+        edits = {
+            field: metadata[field] for field in METADATA_FIELDS if field in metadata
+        }
+        if not edits:
+            return
+        self.pending[user_id].setdefault(node_id, {}).update(edits)
+        self.first_edit.setdefault(user_id, time.monotonic())
+        if (
+            len(self.pending[user_id]) >= self.flush_threshold
+            and user_id not in self._threshold_flushes
+        ):
+            task = asyncio.create_task(self.flush(user_id))
+            self._threshold_flushes[user_id] = task
+            task.add_done_callback(lambda _: self._threshold_flushes.pop(user_id, None))
+
+    def apply_pending(self, user_id: str, graph_service: GraphService):
+        """Apply a user's pending edits to a loaded graph without saving it,
+        so reads see edits that haven't been flushed yet"""
+        for edits in (self.flushing.get(user_id, {}), self.pending.get(user_id, {})):
+            for node_id, metadata in edits.items():
+                graph_service.update_node_metadata(node_id, metadata)
+
+    def has_pending(self, user_id: str, field: str) -> bool:
+        """Check whether any unsaved edit of a user changes field"""
+        return any(
+            field in metadata
+            for edits in (self.flushing.get(user_id, {}), self.pending.get(user_id, {}))
+            for metadata in edits.values()
+        )
+
+    async def flush(self, user_id: str):
+        """Write a user's pending edits to the database"""
+        async with self.lock(user_id):
+            edits = self.pending.pop(user_id, None)
+            self.first_edit.pop(user_id, None)
+            if not edits:
+                return
+            self.flushing[user_id] = edits
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._save, user_id, edits
+                )
+                logger.info(
+                    "Flushed edits of %d nodes for user %s", len(edits), user_id
+                )
+            except Exception as e:
+                logger.error("Error flushing node edits for user %s: %s", user_id, e)
+                # Put the edits back without overwriting newer ones
+                for node_id, metadata in edits.items():
+                    newer = self.pending[user_id].get(node_id, {})
+                    self.pending[user_id][node_id] = {**metadata, **newer}
+                self.first_edit.setdefault(user_id, time.monotonic())
+            finally:
+                del self.flushing[user_id]
+
+    def _save(self, user_id: str, edits: Dict[str, Dict[str, Any]]):
+        graph_service = GraphService(user_id)
+        for node_id, metadata in edits.items():
+            graph_service.update_node_metadata(node_id, metadata)
+        graph_service.save_graph()
+
+    async def flush_due(self):
+        """Flush users whose oldest pending edit is older than the interval"""
+        now = time.monotonic()
+        due = [
+            user_id
+            for user_id, first_edit in self.first_edit.items()
+            if now - first_edit >= self.flush_interval
+            and not self.lock(user_id).locked()
+        ]
+        for user_id in due:
+            await self.flush(user_id)
+
+    async def flush_all(self):
+        """Flush every pending edit, used on shutdown"""
+        for user_id in list(self.pending):
+            await self.flush(user_id)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval / 2)
+            try:
+                await self.flush_due()
+            except Exception as e:
+                logger.error("Error in node edit flush loop: %s", e, exc_info=True)
+
+    def start(self):
+        """Start flushing in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flush and write everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_all()
@@ -3,24 +3,34 @@ import logging
 from email import message_from_bytes
 import base64
 import re
-from typing import Set
-from icalendar import Calendar
+from typing import Optional, Set
 
 from app.config import EMAIL_REGEX, IGNORED_DOMAINS, IGNORED_EMAILS, QUERY_DAYS
-from app.services.gmail_service import GmailService
+from app.metrics import (
+    GENERATIONS_IN_PROGRESS,
+    GMAIL_REQUEST_SECONDS,
+    MESSAGES_PROCESSED,
+    GenerationTrace,
+    observe,
+)
+from app.models.node import Meeting
+from app.services.gmail_service import MailboxService
 from app.services.graph_service import GraphService
 
+logger = logging.getLogger(__name__)
+
 
 class EmailProcessor:
     def __init__(
-        self, gmail_service: GmailService, graph_service: GraphService, progress_queue
+        self, gmail_service: MailboxService, graph_service: GraphService, progress_queue
     ):
         self.gmail_service = gmail_service
         self.graph_service = graph_service
         self.progress_queue = progress_queue
         self.total_steps = 0
         self.current_step = 0
-        self.user_email = None
+        self.user_email: Optional[str] = None
+        self.trace = GenerationTrace(graph_service.user_id)
 
     async def update_progress(self, increment=1):
         """Update progress and send through SSE"""
@@ -31,21 +41,25 @@ class EmailProcessor:
 
     async def process_emails(self, processed_emails: Set[str]):
         """Process emails from the Gmail API"""
+        GENERATIONS_IN_PROGRESS.inc()
+        messages = []
+        result = "error"
         try:
-            logging.info("Starting email processing...")
+            logger.info("Starting email processing...")
             # First, get the user's email address
-            profile = (
-                self.gmail_service.service.users()
-                .getProfile(userId="me")
-                .execute()  # type: ignore[attr-defined]
-            )
+            with observe(GMAIL_REQUEST_SECONDS, "profile"):
+                profile = (
+                    self.gmail_service.service.users()
+                    .getProfile(userId="me")
+                    .execute()  # type: ignore[attr-defined]
+                )
             self.user_email = profile["emailAddress"].lower()
-            logging.info(f"Processing emails for user: {self.user_email}")
+            logger.info("Processing emails for user: %s", self.user_email)
 
             query = f"has:attachment filename:ics newer_than:{QUERY_DAYS}d"
-            logging.info(f"Using query: {query}")
+            logger.info("Using query: %s", query)
             messages = self.gmail_service.get_messages(query)
-            logging.info(f"Found {len(messages)} messages to process")
+            logger.info("Found %d messages to process", len(messages))
 
             self.total_steps = len(messages) * 2
             await self.update_progress(0)
@@ -55,22 +69,29 @@ class EmailProcessor:
                     await self.process_message(message, processed_emails)
                     await self.update_progress(2)
                     if i % 10 == 0:
-                        logging.info(f"Processed {i}/{len(messages)} messages")
-                        logging.info(
-                            f"Current graph has {len(self.graph_service.nodes)} nodes"
+                        logger.info(
+                            "Processed %d/%d messages, graph has %d nodes",
+                            i,
+                            len(messages),
+                            len(self.graph_service.nodes),
                         )
                 except Exception as e:
-                    logging.error(f"Error processing message: {e}")
+                    logger.error("Error processing message: %s", e)
                     continue
 
-            logging.info("Email processing complete")
-            logging.info(
-                f"Final graph has {len(self.graph_service.nodes)} nodes and {len(self.graph_service.links)} links"
+            logger.info(
+                "Email processing complete, graph has %d nodes and %d links",
+                len(self.graph_service.nodes),
+                len(self.graph_service.links),
             )
             await self.update_progress(100)
+            result = "ok"
         except Exception as e:
-            logging.error(f"Error in process_emails: {e}", exc_info=True)
+            logger.error("Error in process_emails: %s", e, exc_info=True)
             raise
+        finally:
+            GENERATIONS_IN_PROGRESS.dec()
+            self.trace.finish(len(messages), result)
 
     def extract_email_addresses(self, mime_msg) -> Set[str]:
         """Extract email addresses from a MIME message"""
@@ -96,78 +117,62 @@ class EmailProcessor:
                         ):
                             participants.add(cleaned_email)
             except Exception as e:
-                logging.error(f"Error extracting email addresses: {e}")
+                logger.error("Error extracting email addresses: %s", e)
         return participants
 
     async def process_message(self, message: dict, processed_emails: Set[str]):
         """Process a single email message"""
+        # icalendar is slow to import, load it on first generation
+        from icalendar import Calendar
+
         try:
             msg_id = message["id"]
             if msg_id in processed_emails:
+                MESSAGES_PROCESSED.labels("skipped").inc()
                 return
 
-            msg_data = self.gmail_service.get_message(msg_id)
+            with self.trace.span("fetch"):
+                msg_data = self.gmail_service.get_message(msg_id)
             if not msg_data:
+                MESSAGES_PROCESSED.labels("skipped").inc()
                 return
 
-            raw = base64.urlsafe_b64decode(msg_data["raw"])
-            mime_msg = message_from_bytes(raw)
+            with self.trace.span("mime_parse"):
+                raw = base64.urlsafe_b64decode(msg_data["raw"])
+                mime_msg = message_from_bytes(raw)
 
             # Extract meetings from calendar attachments
             meetings = []
-            for part in mime_msg.walk():
-                if part.get_content_type() == "text/calendar":
-                    cal_data = part.get_payload(decode=True)
-                    cal = Calendar.from_ical(cal_data)
-                    for component in cal.walk():
-                        if component.name == "VEVENT":
-                            meeting = {
-                                "date": component.get("dtstart").dt.isoformat(),
-                                "title": str(component.get("summary", "No Title")),
-                                "location": str(
-                                    component.get("location", "No Location")
-                                ),
-                            }
-                            meetings.append(meeting)
+            with self.trace.span("ics_parse"):
+                for part in mime_msg.walk():
+                    if part.get_content_type() == "text/calendar":
+                        cal_data = part.get_payload(decode=True)
+                        cal = Calendar.from_ical(cal_data)
+                        for component in cal.walk():
+                            if component.name == "VEVENT":
+                                meeting = Meeting.interned(
+                                    component.get("dtstart").dt.isoformat(),
+                                    component.get("summary", "No Title"),
+                                    component.get("location", "No Location"),
+                                )
+                                meetings.append(meeting)
 
             # Extract participants
-            participants = self.extract_email_addresses(mime_msg)
+            with self.trace.span("extract_addresses"):
+                participants = self.extract_email_addresses(mime_msg)
 
             # Update graph with participants and meetings
-            for email in participants:
-                if email not in self.graph_service.nodes:
-                    self.graph_service.nodes[email] = {
-                        "id": email,
-                        "email": email,
-                        "name": email.split("@")[0],
-                        "company": email.split("@")[1],
-                        "companyDomain": email.split("@")[1],
-                        "firstName": "",
-                        "lastName": "",
-                        "linkedinUrl": "",
-                        "notes": "",
-                        "meetings": meetings,
-                    }
-                else:
-                    # Append new meetings to existing node
-                    existing_meetings = set(
-                        (m["date"], m["title"], m["location"])
-                        for m in self.graph_service.nodes[email].get("meetings", [])
-                    )
-                    for meeting in meetings:
-                        meeting_tuple = (
-                            meeting["date"],
-                            meeting["title"],
-                            meeting["location"],
-                        )
-                        if meeting_tuple not in existing_meetings:
-                            self.graph_service.nodes[email]["meetings"].append(meeting)
+            with self.trace.span("graph_merge"):
+                for email in participants:
+                    self.graph_service.add_contact(email, meetings)
 
-                # Add connections between participants
-                for other_email in participants:
-                    if email != other_email:
-                        self.graph_service.links.add((email, other_email))
+                    # Add connections between participants
+                    for other_email in participants:
+                        self.graph_service.add_link(email, other_email)
 
             processed_emails.add(msg_id)
+            MESSAGES_PROCESSED.labels("ok").inc()
         except Exception as e:
-            logging.error(f"Error processing message {message.get('id')}: {e}")
+            MESSAGES_PROCESSED.labels("error").inc()
+            # Rate limited per template, a bad mailbox can fail on every message
+            logger.error("Error processing message %s: %s", message.get("id"), e)
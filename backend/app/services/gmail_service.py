@@ -1,13 +1,52 @@
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build, Resource
 import logging
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Protocol
+
+from app.config import GMAIL_API_ENDPOINT
+from app.metrics import (
+    GMAIL_BYTES_FETCHED,
+    GMAIL_REQUEST_ERRORS,
+    GMAIL_REQUEST_SECONDS,
+    observe,
+)
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+logger = logging.getLogger(__name__)
+
+
+class MailboxService(Protocol):
+    """The Gmail client interface EmailProcessor uses, GmailService or a stand-in"""
+
+    service: Any
+
+    def get_messages(self, query: str) -> List[Dict[str, Any]]: ...
+
+    def get_message(self, msg_id: str) -> Optional[Dict[str, Any]]: ...
+
+
+def _error_status(error: Exception) -> str:
+    """Get the HTTP status of a failed Gmail request, if it got a response"""
+    return str(getattr(getattr(error, "resp", None), "status", "error"))
+
+
+def _decoded_size(raw: str) -> int:
+    """Get the size of base64 data without decoding it"""
+    return len(raw.rstrip("=")) * 3 // 4
 
 
 class GmailService:
-    def __init__(self, credentials: Credentials):
+    def __init__(self, credentials: "Credentials"):
+        # The API client is slow to import, load it on first generation
+        from googleapiclient.discovery import build
+
         self.credentials = credentials
-        self.service = build("gmail", "v1", credentials=credentials)  # type: ignore[no-untyped-call]
+        client_options = (
+            {"api_endpoint": GMAIL_API_ENDPOINT} if GMAIL_API_ENDPOINT else None
+        )
+        self.service = build(  # type: ignore[no-untyped-call]
+            "gmail", "v1", credentials=credentials, client_options=client_options
+        )
 
     def get_messages(self, query: str) -> List[Dict[str, Any]]:
         """Get messages from Gmail API"""
@@ -16,17 +55,18 @@ class GmailService:
             next_page_token = None
 
             while True:
-                results = (
-                    self.service.users()
-                    .messages()
-                    .list(
-                        userId="me",
-                        q=query,
-                        maxResults=500,  # Get more messages per request
-                        pageToken=next_page_token,
+                with observe(GMAIL_REQUEST_SECONDS, "list"):
+                    results = (
+                        self.service.users()
+                        .messages()
+                        .list(
+                            userId="me",
+                            q=query,
+                            maxResults=500,  # Get more messages per request
+                            pageToken=next_page_token,
+                        )
+                        .execute()  # type: ignore[attr-defined]
                     )
-                    .execute()  # type: ignore[attr-defined]
-                )
                 messages = results.get("messages", [])
                 if messages:
                     all_messages.extend(messages)
@@ -36,21 +76,26 @@ class GmailService:
                 if not next_page_token:
                     break
 
-            logging.info(f"Found total of {len(all_messages)} messages")
+            logger.info("Found total of %d messages", len(all_messages))
             return all_messages
         except Exception as e:
-            logging.error(f"Error getting messages: {e}")
+            GMAIL_REQUEST_ERRORS.labels("list", _error_status(e)).inc()
+            logger.error("Error getting messages: %s", e)
             return []
 
     def get_message(self, msg_id: str) -> Dict[str, Any]:
         """Get a specific message by ID"""
         try:
-            return (
-                self.service.users()  # type: ignore[attr-defined]
-                .messages()
-                .get(userId="me", id=msg_id, format="raw")
-                .execute()
-            )
+            with observe(GMAIL_REQUEST_SECONDS, "get"):
+                message = (
+                    self.service.users()  # type: ignore[attr-defined]
+                    .messages()
+                    .get(userId="me", id=msg_id, format="raw")
+                    .execute()
+                )
+            GMAIL_BYTES_FETCHED.inc(_decoded_size(message.get("raw", "")))
+            return message
         except Exception as e:
-            logging.error(f"Error fetching message {msg_id}: {e}")
+            GMAIL_REQUEST_ERRORS.labels("get", _error_status(e)).inc()
+            logger.error("Error fetching message %s: %s", msg_id, e)
             return None
@@ -0,0 +1,181 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import msgpack  # type: ignore[import-untyped]
+
+from app.models.node import Meeting, Node
+
+GRAPH_MEDIA_TYPE = "application/x-msgpack"
+FORMAT_VERSION = 1
+
+NODE_FIELDS = [
+    "id",
+    "name",
+    "company",
+    "companyDomain",
+    "firstName",
+    "lastName",
+    "linkedinUrl",
+    "notes",
+]
+MEETING_FIELDS = ["date", "title", "location"]
+
+
+def accepts_graph_encoding(accept: str) -> bool:
+    """Check whether an Accept header explicitly asks for the binary encoding.
+
+    Wildcards don't count, JSON stays the default, and q=0 refuses it.
+    """
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        if media_type.strip().lower() != GRAPH_MEDIA_TYPE:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def _pack_ints(values: List[int]) -> bytes:
+    """Pack integers as a little-endian int32 array"""
+    packed = array("i", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_ints(data: bytes) -> array:
+    unpacked = array("i")
+    unpacked.frombytes(data)
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.index[value] = idx
+            self.strings.append(value)
+        return idx
+
+
+def encode_graph(
+    nodes: Iterable[Node],
+    links: Iterable[Tuple[str, str]],
+    extra: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """Encode a graph as msgpack with an interned, columnar layout.
+
+    Every string is stored once in a string table. Node attributes and
+    meetings are stored as int32 columns of string indices, meetings are
+    grouped per node through an offsets column, and links are a pair of int32
+    columns of node indices. A node's email is its id and isn't stored
+    separately. Extra values are stored as is.
+    """
+    strings = _StringTable()
+    nodes = list(nodes)
+
+    node_index = {node.id: i for i, node in enumerate(nodes)}
+    node_columns = {
+        field: _pack_ints([strings.intern(getattr(node, field)) for node in nodes])
+        for field in NODE_FIELDS
+    }
+
+    meeting_offsets = [0]
+    meeting_columns: Dict[str, List[int]] = {field: [] for field in MEETING_FIELDS}
+    for node in nodes:
+        for meeting in node.meetings:
+            for field, value in zip(MEETING_FIELDS, meeting):
+                meeting_columns[field].append(strings.intern(value))
+        meeting_offsets.append(len(meeting_columns["date"]))
+
+    sources = []
+    targets = []
+    for source_id, target_id in links:
+        source = node_index.get(source_id)
+        target = node_index.get(target_id)
+        if source is not None and target is not None:
+            sources.append(source)
+            targets.append(target)
+
+    return msgpack.packb(
+        {
+            "format": FORMAT_VERSION,
+            "strings": strings.strings,
+            "count": len(nodes),
+            "nodes": node_columns,
+            "meetings": {
+                "offsets": _pack_ints(meeting_offsets),
+                **{
+                    field: _pack_ints(column)
+                    for field, column in meeting_columns.items()
+                },
+            },
+            "links": {"source": _pack_ints(sources), "target": _pack_ints(targets)},
+            "extra": extra or {},
+        },
+        use_bin_type=True,
+    )
+
+
+def decode_graph(
+    data: bytes,
+) -> Tuple[List[Node], List[Tuple[str, str]], Dict[str, Any]]:
+    """Decode a graph encoded by encode_graph into nodes, links and extra values"""
+    payload = msgpack.unpackb(data, raw=False)
+    if payload.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported graph format: {payload.get('format')}")
+
+    strings = payload["strings"]
+    count = payload["count"]
+    node_columns = {
+        field: _unpack_ints(payload["nodes"][field]) for field in NODE_FIELDS
+    }
+    meetings = payload["meetings"]
+    offsets = _unpack_ints(meetings["offsets"])
+    meeting_columns = {field: _unpack_ints(meetings[field]) for field in MEETING_FIELDS}
+
+    dates, titles, locations = (meeting_columns[field] for field in MEETING_FIELDS)
+    meetings_by_strings: Dict[Tuple[int, int, int], Meeting] = {}
+
+    nodes = []
+    for i in range(count):
+        node_meetings = []
+        for j in range(offsets[i], offsets[i + 1]):
+            # Attendees of the same meeting share one tuple
+            key = (dates[j], titles[j], locations[j])
+            meeting = meetings_by_strings.get(key)
+            if meeting is None:
+                meeting = Meeting.interned(*(strings[k] for k in key))
+                meetings_by_strings[key] = meeting
+            node_meetings.append(meeting)
+        nodes.append(
+            Node(
+                **{field: strings[node_columns[field][i]] for field in NODE_FIELDS},
+                meetings=node_meetings,
+            )
+        )
+
+    node_ids = node_columns["id"]
+    links = [
+        (strings[node_ids[s]], strings[node_ids[t]])
+        for s, t in zip(
+            _unpack_ints(payload["links"]["source"]),
+            _unpack_ints(payload["links"]["target"]),
+        )
+    ]
+    return nodes, links, payload.get("extra", {})
@@ -1,19 +1,40 @@
 import logging
+import time
+from collections import defaultdict
+from sqlalchemy import select
+from app.config import (
+    GRAPH_STORAGE_FORMAT,
+    MEETING_INDEX_CACHE_ENTRIES,
+    RECENCY_HALF_LIFE_DAYS,
+)
 from app.database import engine, graph_table
-from typing import Dict, Any, Optional
+from app.metrics import CACHE_REQUESTS, GRAPH_DB_SECONDS, GRAPH_SAVED_NODES, observe
+from app.models.node import Meeting, Node
+from app.services.domain_view import aggregate_by_domain, expand_domain
+from app.services.graph_codec import decode_graph, encode_graph
+from app.services.meeting_index import MeetingIndex, MeetingIndexCache, recency_weight
+from typing import Dict, Any, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+meeting_indexes = MeetingIndexCache(MEETING_INDEX_CACHE_ENTRIES)
 
 
 class GraphService:
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, load: bool = True):
         self.user_id = user_id
-        self.nodes = {}
-        self.links = set()
-        self._load_graph()
+        self.nodes: Dict[str, Node] = {}
+        self.links: Set[Tuple[str, str]] = set()
+        self.version = 0
+        self.index: Optional[MeetingIndex] = None
+        # Nodes shared with the meeting index cache, copied before editing
+        self._cached_nodes: Optional[Dict[str, Node]] = None
+        if load:
+            self._load_graph()
 
-    def _load_graph(self) -> Dict[str, Any]:
+    def _load_graph(self):
         """Load graph from database"""
         try:
-            with engine.connect() as conn:
+            with observe(GRAPH_DB_SECONDS, "load"), engine.connect() as conn:
                 result = (
                     conn.execute(
                         graph_table.select().where(
@@ -23,45 +44,185 @@ class GraphService:
                     .mappings()
                     .first()
                 )
-                if result and result.get("data"):
+                if result and result.get("blob"):
+                    nodes, links, _ = decode_graph(result["blob"])
+                    self.version = (result["data"] or {}).get("version", 0)
+                    self.nodes = {node.id: node for node in nodes}
+                    self.links = set(links)
+                elif result and result.get("data"):
                     data = result["data"]
-                    # Ensure all nodes have the required metadata fields
-                    for node in data["nodes"]:
-                        if "meetings" not in node:
-                            node["meetings"] = []
-                        if "company" not in node:
-                            node["company"] = ""
-                        if "companyDomain" not in node:
-                            node["companyDomain"] = ""
-                        if "firstName" not in node:
-                            node["firstName"] = ""
-                        if "lastName" not in node:
-                            node["lastName"] = ""
-                        if "linkedinUrl" not in node:
-                            node["linkedinUrl"] = ""
-                        if "notes" not in node:
-                            node["notes"] = ""
-
-                    self.nodes = {node["id"]: node for node in data["nodes"]}
+                    meeting_pool = {}
+                    self.version = data.get("version", 0)
+                    self.nodes = {
+                        node["id"]: Node.from_dict(node, meeting_pool)
+                        for node in data["nodes"]
+                    }
                     self.links = {
                         (link["source"], link["target"]) for link in data["links"]
                     }
-                    return data  # Return the graph data
-                return {"nodes": [], "links": []}  # Return empty graph if none exists
         except Exception as e:
-            logging.error(f"Error loading graph: {e}", exc_info=True)
-            return {"nodes": [], "links": []}  # Return empty graph on error
+            logger.error("Error loading graph: %s", e, exc_info=True)
 
-    def save_graph(self):
-        """Save graph to database"""
-        graph_data = {
-            "nodes": list(self.nodes.values()),
+    def _load_version(self) -> int:
+        """Read only the version of the saved graph"""
+        with observe(GRAPH_DB_SECONDS, "load_version"), engine.connect() as conn:
+            version = conn.execute(
+                select(graph_table.c.data["version"].as_integer()).where(
+                    graph_table.c.user_id == self.user_id
+                )
+            ).scalar()
+        return version or 0
+
+    def load_indexed(self):
+        """Load the graph for time-range queries.
+
+        When the saved version is the one last indexed, the cached graph is
+        used and only the version is read from the database.
+        """
+        try:
+            version = self._load_version()
+        except Exception as e:
+            logger.error("Error loading graph version: %s", e, exc_info=True)
+            return
+        cached = meeting_indexes.get(self.user_id, version)
+        if cached is None:
+            self._load_graph()
+            cached = meeting_indexes.put(
+                self.user_id, self.version, self.nodes, self.links
+            )
+        self.version = cached.version
+        self.nodes = self._cached_nodes = cached.nodes
+        self.links = cached.links
+        self.index = cached.meeting_index
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the graph to its JSON shape"""
+        return {
+            "version": self.version,
+            "nodes": [node.to_dict() for node in self.nodes.values()],
             "links": [
                 {"source": source, "target": target} for (source, target) in self.links
             ],
         }
+
+    def get_domain_graph(self) -> Dict[str, Any]:
+        """Load the per-domain aggregated graph without loading the contacts"""
         try:
-            with engine.connect() as conn:
+            with observe(GRAPH_DB_SECONDS, "load_domains"), engine.connect() as conn:
+                result = (
+                    conn.execute(
+                        select(
+                            graph_table.c.data["version"].label("version"),
+                            graph_table.c.data["domains"].label("domains"),
+                        ).where(graph_table.c.user_id == self.user_id)
+                    )
+                    .mappings()
+                    .first()
+                )
+            if not result:
+                return {"nodes": [], "links": [], "version": 0}
+            domains = result["domains"]
+            version = result["version"] or 0
+            if domains and domains.get("version") == version:
+                CACHE_REQUESTS.labels("domain_view", "hit").inc()
+                return domains
+        except Exception as e:
+            logger.error("Error loading domain graph: %s", e, exc_info=True)
+            return {"nodes": [], "links": [], "version": 0}
+
+        # Graphs saved before domain views existed have no precomputed aggregate
+        CACHE_REQUESTS.labels("domain_view", "miss").inc()
+        self._load_graph()
+        return self._build_domain_graph()
+
+    def expand_domain(self, domain: str) -> Dict[str, Any]:
+        """Get the contacts of a single domain"""
+        graph = expand_domain(list(self.nodes.values()), self.links, domain)
+        graph["version"] = self.version
+        return graph
+
+    def get_subgraph(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        by_domain: bool = False,
+    ) -> Dict[str, Any]:
+        """Get the nodes and links active between two timestamps.
+
+        Nodes only keep their meetings inside the window. A link is active when
+        both ends attended a meeting in the window, and its strength sums the
+        meetings' weights, halving every RECENCY_HALF_LIFE_DAYS before the end
+        of the window. With by_domain the active graph is aggregated per domain.
+        """
+        if self.index is None:
+            self.index = MeetingIndex(self.nodes.values())
+        index = self.index
+        reference = end if end is not None else time.time()
+        half_life = RECENCY_HALF_LIFE_DAYS * 24 * 60 * 60
+
+        node_meetings = defaultdict(list)
+        attendees = defaultdict(set)
+        meeting_times = {}
+        for timestamp, email, meeting in index.range(start, end):
+            node_meetings[email].append(meeting)
+            attendees[meeting].add(email)
+            meeting_times[meeting] = timestamp
+
+        strengths: Dict[Tuple[str, str], float] = defaultdict(float)
+        for meeting, emails in attendees.items():
+            weight = recency_weight(meeting_times[meeting], reference, half_life)
+            for source in emails:
+                for target in emails:
+                    if source < target and (
+                        (source, target) in self.links or (target, source) in self.links
+                    ):
+                        strengths[(source, target)] += weight
+
+        if by_domain:
+            active_nodes = [
+                self.nodes[email] for email in node_meetings if email in self.nodes
+            ]
+            domains = aggregate_by_domain(
+                active_nodes,
+                strengths.keys(),
+                meetings=node_meetings,
+                strengths=strengths,
+            )
+            domains["version"] = self.version
+            return domains
+
+        return {
+            "version": self.version,
+            "nodes": [
+                self.nodes[email].to_dict(meetings)
+                for email, meetings in node_meetings.items()
+                if email in self.nodes
+            ],
+            "links": [
+                {"source": source, "target": target, "strength": strength}
+                for (source, target), strength in strengths.items()
+            ],
+        }
+
+    def _build_domain_graph(self) -> Dict[str, Any]:
+        domains = aggregate_by_domain(self.nodes.values(), self.links)
+        domains["version"] = self.version
+        return domains
+
+    def save_graph(self):
+        """Save graph to database"""
+        self.version += 1
+        domains = self._build_domain_graph()
+        if GRAPH_STORAGE_FORMAT == "msgpack":
+            # Keep the small header in JSONB so the domain view can still select it
+            graph_data = {"version": self.version, "domains": domains}
+            blob = encode_graph(self.nodes.values(), self.links)
+        else:
+            graph_data = {**self.to_dict(), "domains": domains}
+            blob = None
+        GRAPH_SAVED_NODES.observe(len(self.nodes))
+        try:
+            with observe(GRAPH_DB_SECONDS, "save"), engine.connect() as conn:
                 with conn.begin():
                     conn.execute(
                         graph_table.delete().where(
@@ -73,30 +234,25 @@ class GraphService:
                             id=f"graph_{self.user_id}",
                             user_id=self.user_id,
                             data=graph_data,
+                            blob=blob,
                         )
                     )
                     conn.commit()
         except Exception as e:
-            logging.error(f"Error saving graph: {e}")
+            logger.error("Error saving graph: %s", e)
             raise
 
     def add_node(self, email: str, name: str = None):
         """Add a node to the graph with extended metadata"""
         if email not in self.nodes:
-            # Create node with extended metadata
-            self.nodes[email] = {
-                "id": email,
-                "email": email,
-                "name": name or email,
-                # Additional metadata fields
-                "company": "",
-                "companyDomain": "",
-                "firstName": "",
-                "lastName": "",
-                "linkedinUrl": "",
-                "notes": "",
-                "meetings": [],  # List of meeting objects
-            }
+            self.nodes[email] = Node(email, name=name or email)
+
+    def add_contact(self, email: str, meetings: Iterable[Meeting]):
+        """Add a meeting participant, merging meetings into an existing node"""
+        node = self.nodes.get(email)
+        if node is None:
+            node = self.nodes[email] = Node.from_email(email)
+        node.add_meetings(meetings)
 
     def add_link(self, source: str, target: str):
         """Add a link between two nodes"""
@@ -106,25 +262,16 @@ class GraphService:
     def add_meeting(self, email: str, meeting: Dict[str, Any]):
         """Add a meeting to a node's meeting list"""
         if email in self.nodes:
-            # Ensure meeting has required fields
-            meeting_data = {
-                "date": meeting.get("date", ""),
-                "title": meeting.get("title", ""),
-                "location": meeting.get("location", ""),
-            }
-            self.nodes[email]["meetings"].append(meeting_data)
+            self.nodes[email].meetings.append(Meeting.from_dict(meeting))
 
     def update_node_metadata(self, email: str, metadata: Dict[str, Any]):
         """Update a node's metadata"""
-        if email in self.nodes:
-            allowed_fields = [
-                "company",
-                "companyDomain",
-                "firstName",
-                "lastName",
-                "linkedinUrl",
-                "notes",
-            ]
-            for field in allowed_fields:
-                if field in metadata:
-                    self.nodes[email][field] = metadata[field]
+        node = self.nodes.get(email)
+        if node is None:
+            return
+        if self._cached_nodes is not None and self._cached_nodes.get(email) is node:
+            if self.nodes is self._cached_nodes:
+                self.nodes = dict(self.nodes)
+            node = node.copy()
+            self.nodes[email] = node
+        node.update_metadata(metadata)
@@ -0,0 +1,120 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time, timezone
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from app.metrics import CACHE_REQUESTS
+from app.models.node import Meeting, Node
+
+
+def meeting_timestamp(value: str, end_of_day: bool = False) -> Optional[float]:
+    """Convert a meeting's ISO date or datetime to a UTC timestamp.
+
+    A date without a time is midnight, or the last instant of that day with
+    end_of_day, so it can close an inclusive range.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if end_of_day and "T" not in value and " " not in value:
+        parsed = datetime.combine(date.fromisoformat(value), time.max)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class MeetingIndex:
+    """Meetings of all nodes sorted by start time.
+
+    Times and entries are kept in parallel lists so a range query is a pair
+    of binary searches followed by a slice.
+    """
+
+    def __init__(self, nodes: Iterable[Node]):
+        entries: List[Tuple[float, str, Meeting]] = []
+        for node in nodes:
+            for meeting in node.meetings:
+                timestamp = meeting_timestamp(meeting.date)
+                if timestamp is not None:
+                    entries.append((timestamp, node.id, meeting))
+        entries.sort(key=lambda entry: entry[0])
+        self.times = [entry[0] for entry in entries]
+        self.entries = [(entry[1], entry[2]) for entry in entries]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Iterator[Tuple[float, str, Meeting]]:
+        """Iterate over meetings starting in [start, end]"""
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect_right(self.times, end)
+        for i in range(lo, hi):
+            email, meeting = self.entries[i]
+            yield self.times[i], email, meeting
+
+
+class IndexedGraph(NamedTuple):
+    """A saved graph version with its meeting index"""
+
+    version: int
+    meeting_index: MeetingIndex
+    nodes: Dict[str, Node]
+    links: Set[Tuple[str, str]]
+
+    @property
+    def size(self) -> int:
+        return len(self.nodes) + len(self.links) + len(self.meeting_index)
+
+
+class MeetingIndexCache:
+    """Keep the indexed graphs of recently queried users, keyed by version.
+
+    The nodes and links are kept along with the index, so range queries on
+    an unchanged graph don't have to load it from the database again. The
+    total number of nodes, links and meetings held is bounded by max_entries,
+    least recently used graphs are dropped first. The cached nodes are shared
+    between requests and must not be modified.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = 0
+        self._graphs: "OrderedDict[str, IndexedGraph]" = OrderedDict()
+
+    def get(self, user_id: str, version: int) -> Optional[IndexedGraph]:
+        cached = self._graphs.get(user_id)
+        if cached is None or cached.version != version:
+            CACHE_REQUESTS.labels("meeting_index", "miss").inc()
+            return None
+        CACHE_REQUESTS.labels("meeting_index", "hit").inc()
+        self._graphs.move_to_end(user_id)
+        return cached
+
+    def put(
+        self,
+        user_id: str,
+        version: int,
+        nodes: Dict[str, Node],
+        links: Set[Tuple[str, str]],
+    ) -> IndexedGraph:
+        graph = IndexedGraph(version, MeetingIndex(nodes.values()), nodes, links)
+        previous = self._graphs.pop(user_id, None)
+        if previous is not None:
+            self.entries -= previous.size
+        if graph.size > self.max_entries:
+            return graph
+        self._graphs[user_id] = graph
+        self.entries += graph.size
+        while self.entries > self.max_entries:
+            _, evicted = self._graphs.popitem(last=False)
+            self.entries -= evicted.size
+        return graph
+
+
+def recency_weight(timestamp: float, end: float, half_life: float) -> float:
+    """Exponential decay weight of a meeting relative to the end of the window"""
+    return math.pow(0.5, max(end - timestamp, 0.0) / half_life)
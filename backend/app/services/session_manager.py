@@ -1,11 +1,19 @@
 import pickle
-from google.oauth2.credentials import Credentials
 from redis.asyncio import Redis
 import logging
+from typing import TYPE_CHECKING
+
+from app.config import REDIS_DB, REDIS_HOST, REDIS_PORT
+from app.metrics import CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+logger = logging.getLogger(__name__)
 
 
 class UserSession:
-    def __init__(self, user_id: str, credentials: Credentials):
+    def __init__(self, user_id: str, credentials: "Credentials"):
         self.user_id = user_id
         self.credentials = credentials
         self.gmail_service = None
@@ -13,7 +21,9 @@ class UserSession:
 
 class SessionManager:
     def __init__(self):
-        self.redis = Redis(host="redis", port=6379, db=0, decode_responses=False)
+        self.redis = Redis(
+            host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=False
+        )
         self.ttl = 24 * 60 * 60  # 24 hours
         self.sessions = {}  # In-memory cache
 
@@ -27,25 +37,29 @@ class SessionManager:
             session_data = pickle.dumps(session)
             await self.redis.set(f"session:{user_id}", session_data, ex=self.ttl)
         except Exception as e:
-            logging.error(f"Error storing session: {e}")
+            logger.error("Error storing session: %s", e)
 
     async def get_session(self, user_id: str) -> UserSession | None:
         """Get session from memory or Redis"""
         try:
             # Try memory first
             if user_id in self.sessions:
+                CACHE_REQUESTS.labels("session_memory", "hit").inc()
                 return self.sessions[user_id]
+            CACHE_REQUESTS.labels("session_memory", "miss").inc()
 
             # Try Redis
             session_data = await self.redis.get(f"session:{user_id}")
             if session_data:
+                CACHE_REQUESTS.labels("session_redis", "hit").inc()
                 session = pickle.loads(session_data)
                 self.sessions[user_id] = session  # Cache in memory
                 return session
 
+            CACHE_REQUESTS.labels("session_redis", "miss").inc()
             return None
         except Exception as e:
-            logging.error(f"Error retrieving session: {e}")
+            logger.error("Error retrieving session: %s", e)
             return None
 
     async def remove_session(self, user_id: str):
@@ -55,4 +69,4 @@ class SessionManager:
                 del self.sessions[user_id]
             await self.redis.delete(f"session:{user_id}")
         except Exception as e:
-            logging.error(f"Error removing session: {e}")
+            logger.error("Error removing session: %s", e)
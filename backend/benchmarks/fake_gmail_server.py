@@ -0,0 +1,143 @@
+"""Local HTTP stand-in for the Gmail API.
+
+Serves the profile, message list and raw message endpoints used by
+GmailService from a SyntheticMailbox. Every response can be delayed and a
+share of them answered with 429 to mimic Gmail's rate limiting. Point the
+backend at it with GMAIL_API_ENDPOINT=http://host:port.
+
+    python -m benchmarks.fake_gmail_server --port 8002 --latency-ms 50
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic_mailbox import SyntheticMailbox
+
+PAGE_SIZE = 500
+
+PROFILE_PATH = re.compile(r"/gmail/v1/users/[^/]+/profile$")
+LIST_PATH = re.compile(r"/gmail/v1/users/[^/]+/messages$")
+GET_PATH = re.compile(r"/gmail/v1/users/[^/]+/messages/([^/]+)$")
+
+
+class FakeGmailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        mailbox: SyntheticMailbox,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+    ):
+        super().__init__(address, _Handler)
+        self.mailbox = mailbox
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeGmailServer
+
+    def do_GET(self):
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        with server._lock:
+            server.requests += 1
+            limited = random.random() < server.rate_limit_ratio
+            if limited:
+                server.rate_limited += 1
+        if limited:
+            self._send(
+                429,
+                {"error": {"code": 429, "message": "Rate Limit Exceeded"}},
+                {"Retry-After": "1"},
+            )
+            return
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        mailbox = server.mailbox
+        if PROFILE_PATH.match(url.path):
+            self._send(200, {"emailAddress": mailbox.user_email})
+        elif LIST_PATH.match(url.path):
+            offset = int(query.get("pageToken", ["0"])[0])
+            limit = min(int(query.get("maxResults", [PAGE_SIZE])[0]), PAGE_SIZE)
+            end = min(offset + limit, mailbox.message_count)
+            body = {
+                "messages": [{"id": f"msg{i}"} for i in range(offset, end)],
+                "resultSizeEstimate": mailbox.message_count,
+            }
+            if end < mailbox.message_count:
+                body["nextPageToken"] = str(end)
+            self._send(200, body)
+        elif match := GET_PATH.match(url.path):
+            self._send(200, mailbox.get_message(match.group(1)))
+        else:
+            self._send(404, {"error": {"code": 404, "message": "Not Found"}})
+
+    def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0)
+    args = parser.parse_args()
+
+    server = FakeGmailServer(
+        (args.host, args.port),
+        SyntheticMailbox(args.messages),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_limit_ratio=args.rate_limit_ratio,
+    )
+    print(f"Serving fake Gmail API on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare the memory used by dict nodes and slotted Node objects.
+
+Builds a synthetic graph in the stored JSON shape, then measures the
+resident size of the old dict-of-dicts layout and of GraphService's Node
+layout after both are loaded from the same JSON.
+
+    python -m benchmarks.node_memory --contacts 20000 --meetings 8
+"""
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+
+from app.models.node import Node
+
+
+def build_graph_json(contacts: int, meetings: int, companies: int) -> str:
+    rng = random.Random(0)
+    shared = [
+        {
+            "date": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T10:00:00+00:00",
+            "title": f"Weekly sync {i}",
+            "location": "https://meet.google.com/abc-defg-hij",
+        }
+        for i in range(contacts // 4 + 1)
+    ]
+    nodes = []
+    for i in range(contacts):
+        domain = f"company{i % companies}.com"
+        email = f"person{i}@{domain}"
+        nodes.append(
+            {
+                "id": email,
+                "email": email,
+                "name": f"person{i}",
+                "company": domain,
+                "companyDomain": domain,
+                "firstName": "",
+                "lastName": "",
+                "linkedinUrl": "",
+                "notes": "",
+                "meetings": rng.sample(shared, min(meetings, len(shared))),
+            }
+        )
+    return json.dumps({"nodes": nodes, "links": []})
+
+
+def measure(load) -> int:
+    gc.collect()
+    tracemalloc.start()
+    graph = load()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graph
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--meetings", type=int, default=8)
+    parser.add_argument("--companies", type=int, default=200)
+    args = parser.parse_args()
+
+    raw = build_graph_json(args.contacts, args.meetings, args.companies)
+
+    def load_dicts():
+        data = json.loads(raw)
+        return {node["id"]: node for node in data["nodes"]}
+
+    def load_nodes():
+        data = json.loads(raw)
+        meeting_pool = {}
+        nodes = {
+            node["id"]: Node.from_dict(node, meeting_pool) for node in data["nodes"]
+        }
+        del data
+        return nodes
+
+    dict_size = measure(load_dicts)
+    node_size = measure(load_nodes)
+    print(f"contacts: {args.contacts}, meetings per contact: {args.meetings}")
+    print(f"dict nodes: {dict_size / 1024 / 1024:8.1f} MiB")
+    print(f"Node slots: {node_size / 1024 / 1024:8.1f} MiB")
+    print(f"ratio:      {dict_size / node_size:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Micro-benchmarks for the ingestion pipeline.
+
+Runs EmailProcessor against a synthetic mailbox and times message
+processing, address extraction, graph serialization and, when the
+database is reachable, GraphService.save_graph and _load_graph. Results
+are written as JSON so runs from different releases can be compared.
+They go to BENCHMARK_RESULTS_DIR, outside the source tree by default so
+writing them doesn't restart a reloading dev server.
+
+    python -m benchmarks.run --sizes 1000 10000 100000
+    python -m benchmarks.run --sizes 1000 --baseline ~/.cache/beyondmeet-benchmarks/old.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from email import message_from_bytes
+from pathlib import Path
+from typing import Any, Callable, Dict, Set
+
+from app.services.email_processor import EmailProcessor
+from app.services.graph_codec import encode_graph
+from app.services.graph_service import GraphService
+
+from benchmarks.synthetic_mailbox import SyntheticMailbox
+
+RESULTS_DIR = Path(
+    os.environ.get(
+        "BENCHMARK_RESULTS_DIR", Path.home() / ".cache" / "beyondmeet-benchmarks"
+    )
+)
+
+
+# Messages built ahead of each timed batch of process_message calls
+PREFETCH_BATCH = 1000
+
+
+def timed(func: Callable[[], Any], repeat: int = 1) -> Dict[str, float]:
+    """Time func, returning the best and median of repeat runs in seconds"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return {"best_s": min(durations), "median_s": statistics.median(durations)}
+
+
+def bench_process_message(mailbox: SyntheticMailbox, user_id: str) -> Dict[str, Any]:
+    graph_service = GraphService(user_id, load=False)
+    processor = EmailProcessor(mailbox, graph_service, asyncio.Queue())
+    processor.user_email = mailbox.user_email
+    messages = mailbox.get_messages("")
+    processed_emails: Set[str] = set()
+
+    async def process_all() -> float:
+        # Messages are built in batches outside the timed region
+        duration = 0.0
+        for offset in range(0, len(messages), PREFETCH_BATCH):
+            batch = messages[offset : offset + PREFETCH_BATCH]
+            mailbox.prefetch(message["id"] for message in batch)
+            start = time.perf_counter()
+            for message in batch:
+                await processor.process_message(message, processed_emails)
+            duration += time.perf_counter() - start
+        mailbox.prefetch([])
+        return duration
+
+    duration = asyncio.run(process_all())
+    return {
+        "graph_service": graph_service,
+        "result": {
+            "seconds": duration,
+            "messages_per_s": len(messages) / duration,
+            "processed": len(processed_emails),
+            "nodes": len(graph_service.nodes),
+            "links": len(graph_service.links),
+        },
+    }
+
+
+def bench_extract_email_addresses(
+    mailbox: SyntheticMailbox, samples: int
+) -> Dict[str, Any]:
+    processor = EmailProcessor(mailbox, GraphService("benchmark", load=False), None)
+    processor.user_email = mailbox.user_email
+    mime_messages = [
+        message_from_bytes(mailbox.build_message(i))
+        for i in range(min(samples, mailbox.message_count))
+    ]
+
+    def extract_all():
+        for mime_msg in mime_messages:
+            processor.extract_email_addresses(mime_msg)
+
+    result = timed(extract_all, repeat=3)
+    result["messages"] = len(mime_messages)
+    result["messages_per_s"] = len(mime_messages) / result["best_s"]
+    return result
+
+
+def bench_serialization(graph_service: GraphService) -> Dict[str, Any]:
+    json_bytes = json.dumps(graph_service.to_dict()).encode()
+    msgpack_bytes = encode_graph(graph_service.nodes.values(), graph_service.links)
+    return {
+        "json": {
+            **timed(lambda: json.dumps(graph_service.to_dict()), repeat=3),
+            "bytes": len(json_bytes),
+        },
+        "msgpack": {
+            **timed(
+                lambda: encode_graph(graph_service.nodes.values(), graph_service.links),
+                repeat=3,
+            ),
+            "bytes": len(msgpack_bytes),
+        },
+    }
+
+
+def bench_storage(graph_service: GraphService) -> Dict[str, Any]:
+    try:
+        save = timed(graph_service.save_graph, repeat=3)
+        load = timed(GraphService(graph_service.user_id, load=False)._load_graph, 3)
+    except Exception as e:
+        return {"skipped": f"database unavailable: {e.__class__.__name__}"}
+    finally:
+        _delete_graph(graph_service.user_id)
+    return {"save_graph": save, "load_graph": load}
+
+
+def _delete_graph(user_id: str):
+    from app.database import engine, graph_table
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(graph_table.delete().where(graph_table.c.user_id == user_id))
+    except Exception:
+        pass
+
+
+def run_size(size: int, seed: int) -> Dict[str, Any]:
+    mailbox = SyntheticMailbox(size, seed=seed)
+    user_id = f"benchmark-{size}"
+
+    print(f"[{size}] process_message")
+    processed = bench_process_message(mailbox, user_id)
+    graph_service = processed["graph_service"]
+    print(f"[{size}] extract_email_addresses")
+    extract = bench_extract_email_addresses(mailbox, min(size, 5000))
+    print(f"[{size}] serialization")
+    serialization = bench_serialization(graph_service)
+    print(f"[{size}] storage")
+    storage = bench_storage(graph_service)
+
+    return {
+        "process_message": processed["result"],
+        "extract_email_addresses": extract,
+        "get_graph_serialization": serialization,
+        "storage": storage,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print how every timing and size changed relative to a baseline run"""
+    before = _flatten(baseline["sizes"])
+    after = _flatten(current["sizes"])
+    for name in sorted(after):
+        if name in before and before[name] and name.endswith(("_s", "bytes")):
+            change = (after[name] - before[name]) / before[name] * 100
+            print(
+                f"{name:70} {before[name]:12.4g} -> {after[name]:12.4g} {change:+7.1f}%"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, help="previous results to compare")
+    args = parser.parse_args()
+
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "sizes": {str(size): run_size(size, args.seed) for size in args.sizes},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{results['commit']}-{int(time.time())}.json"
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        compare(results, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Cold start budget check.
+
+Measures how long importing app.main takes in a fresh interpreter, checks
+that the heavy Google and calendar libraries are only imported when first
+used, and measures the time from starting uvicorn to the first successful
+liveness check. Exits with status 1 when a budget is exceeded, so it can
+run in CI.
+
+    python -m benchmarks.startup --import-budget 2 --first-request-budget 4
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported before they're first needed
+LAZY_MODULES = [
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "google.oauth2",
+    "icalendar",
+]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+duration = time.perf_counter() - start
+print(json.dumps({"seconds": duration, "modules": sorted(sys.modules)}))
+"""
+
+
+def measure_import(repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    loaded = set(runs[-1]["modules"])
+    return {
+        "best_s": min(run["seconds"] for run in runs),
+        "eager_heavy_modules": [module for module in LAZY_MODULES if module in loaded],
+    }
+
+
+def measure_first_request(port: int, path: str, timeout: float) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1)
+                if response.status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"{path} did not answer within {timeout} seconds")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget", type=float, default=2.0)
+    parser.add_argument("--first-request-budget", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8003)
+    parser.add_argument("--path", default="/healthz")
+    args = parser.parse_args()
+
+    imports = measure_import(args.repeat)
+    first_request = measure_first_request(args.port, args.path, timeout=30)
+
+    failures = []
+    if imports["best_s"] > args.import_budget:
+        failures.append(
+            f"importing app.main took {imports['best_s']:.2f}s, "
+            f"budget is {args.import_budget:.2f}s"
+        )
+    if imports["eager_heavy_modules"]:
+        failures.append(
+            f"imported at startup: {', '.join(imports['eager_heavy_modules'])}"
+        )
+    if first_request > args.first_request_budget:
+        failures.append(
+            f"first {args.path} answered after {first_request:.2f}s, "
+            f"budget is {args.first_request_budget:.2f}s"
+        )
+
+    print(
+        json.dumps(
+            {
+                "import_s": imports["best_s"],
+                "eager_heavy_modules": imports["eager_heavy_modules"],
+                "first_request_s": first_request,
+                "failures": failures,
+            },
+            indent=2,
+        )
+    )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Synthetic mailbox standing in for GmailService.
+
+Messages are generated on demand from their index, so large mailboxes
+don't have to be held in memory and the same seed always produces the
+same mailbox. Benchmarks prefetch the messages they are about to time, so
+building them isn't measured.
+"""
+
+import base64
+import random
+from datetime import datetime, timedelta, timezone
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, Iterable, List, Optional
+
+FIRST_NAMES = ["alex", "sam", "dana", "noa", "lee", "kim", "omer", "maya", "yael"]
+LAST_NAMES = ["cohen", "levi", "smith", "garcia", "chen", "novak", "silva", "katz"]
+TITLES = ["Weekly sync", "Intro call", "Design review", "1:1", "Quarterly planning"]
+LOCATIONS = ["https://meet.google.com/abc-defg-hij", "Room 4.02", "Zoom", ""]
+
+
+class _Request:
+    def __init__(self, result: Dict[str, Any]):
+        self.result = result
+
+    def execute(self) -> Dict[str, Any]:
+        return self.result
+
+
+class _Users:
+    def __init__(self, email: str):
+        self.email = email
+
+    def getProfile(self, userId: str) -> _Request:
+        return _Request({"emailAddress": self.email})
+
+
+class _Service:
+    def __init__(self, email: str):
+        self._users = _Users(email)
+
+    def users(self) -> _Users:
+        return self._users
+
+
+class SyntheticMailbox:
+    """A fake GmailService with calendar invitations.
+
+    Each message has a plain text and HTML body mentioning a few addresses,
+    an ICS invitation with an organizer and attendees, and sometimes an
+    unrelated binary attachment. A share of the events are recurring.
+    """
+
+    def __init__(
+        self,
+        messages: int,
+        contacts: Optional[int] = None,
+        domains: Optional[int] = None,
+        max_attendees: int = 8,
+        recurring_ratio: float = 0.2,
+        noise_ratio: float = 0.3,
+        seed: int = 0,
+        user_email: str = "me@example.com",
+    ):
+        self.message_count = messages
+        self.max_attendees = max_attendees
+        self.recurring_ratio = recurring_ratio
+        self.noise_ratio = noise_ratio
+        self.seed = seed
+        self.user_email = user_email
+        self.service = _Service(user_email)
+
+        rng = random.Random(seed)
+        contacts = contacts or max(50, messages // 10)
+        domains = domains or max(5, contacts // 20)
+        domain_names = [f"company{i}.com" for i in range(domains)]
+        self.contacts = [
+            f"{rng.choice(FIRST_NAMES)}.{rng.choice(LAST_NAMES)}{i}"
+            f"@{rng.choice(domain_names)}"
+            for i in range(contacts)
+        ]
+        self.start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.prefetched: Dict[str, Dict[str, Any]] = {}
+
+    def get_messages(self, query: str) -> List[Dict[str, Any]]:
+        return [{"id": f"msg{i}"} for i in range(self.message_count)]
+
+    def get_message(self, msg_id: str) -> Dict[str, Any]:
+        message = self.prefetched.get(msg_id)
+        if message is not None:
+            return message
+        raw = self.build_message(int(msg_id[len("msg") :]))
+        return {"id": msg_id, "raw": base64.urlsafe_b64encode(raw).decode("ascii")}
+
+    def prefetch(self, msg_ids: Iterable[str]):
+        """Build messages ahead of time, replacing the previous prefetch"""
+        self.prefetched = {}
+        self.prefetched = {msg_id: self.get_message(msg_id) for msg_id in msg_ids}
+
+    def build_message(self, index: int) -> bytes:
+        """Build the MIME bytes of one message"""
+        rng = random.Random(self.seed * 1_000_003 + index)
+        attendees = rng.sample(
+            self.contacts, rng.randint(1, min(self.max_attendees, len(self.contacts)))
+        )
+        organizer = attendees[0]
+        start = self.start + timedelta(
+            days=rng.randint(0, 364), hours=rng.randint(8, 18)
+        )
+        title = f"{rng.choice(TITLES)} #{rng.randint(1, 50)}"
+        location = rng.choice(LOCATIONS)
+
+        msg = MIMEMultipart("mixed")
+        msg["Subject"] = f"Invitation: {title}"
+        msg["From"] = organizer
+        msg["To"] = ", ".join([self.user_email] + attendees[1:])
+
+        body = (
+            f"{organizer} has invited you to {title}.\n"
+            f"Reply to {rng.choice(attendees)} with questions.\n"
+            "Invitation from Google Calendar. Forwarding this invitation could "
+            "allow any recipient to send a response to the organizer.\n"
+        )
+        alternative = MIMEMultipart("alternative")
+        alternative.attach(MIMEText(body, "plain"))
+        alternative.attach(MIMEText(f"<html><body><p>{body}</p></body></html>", "html"))
+        msg.attach(alternative)
+
+        msg.attach(
+            MIMEText(
+                self._build_ics(
+                    rng, index, organizer, attendees, start, title, location
+                ),
+                "calendar",
+            )
+        )
+
+        if rng.random() < self.noise_ratio:
+            noise = MIMEApplication(rng.randbytes(rng.randint(512, 8192)), "pdf")
+            noise.add_header("Content-Disposition", "attachment", filename="agenda.pdf")
+            msg.attach(noise)
+
+        return msg.as_bytes()
+
+    def _build_ics(
+        self,
+        rng: random.Random,
+        index: int,
+        organizer: str,
+        attendees: List[str],
+        start: datetime,
+        title: str,
+        location: str,
+    ) -> str:
+        end = start + timedelta(minutes=rng.choice([15, 30, 45, 60]))
+        lines = [
+            "BEGIN:VCALENDAR",
+            "PRODID:-//Google Inc//Google Calendar 70.9054//EN",
+            "VERSION:2.0",
+            "METHOD:REQUEST",
+            "BEGIN:VEVENT",
+            f"DTSTART:{start:%Y%m%dT%H%M%SZ}",
+            f"DTEND:{end:%Y%m%dT%H%M%SZ}",
+            f"DTSTAMP:{start:%Y%m%dT%H%M%SZ}",
+            f"ORGANIZER;CN={organizer}:mailto:{organizer}",
+            f"UID:{self.seed}x{index}@google.com",
+        ]
+        if rng.random() < self.recurring_ratio:
+            lines.append(f"RRULE:FREQ=WEEKLY;COUNT={rng.randint(2, 20)}")
+        for attendee in attendees + [self.user_email]:
+            lines.append(
+                "ATTENDEE;CUTYPE=INDIVIDUAL;ROLE=REQ-PARTICIPANT;PARTSTAT=NEEDS-ACTION;"
+                f"CN={attendee}:mailto:{attendee}"
+            )
+        lines += [
+            f"SUMMARY:{title}",
+            f"LOCATION:{location}",
+            "STATUS:CONFIRMED",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        ]
+        return "\r\n".join(lines) + "\r\n"